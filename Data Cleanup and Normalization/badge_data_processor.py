@@ -14,26 +14,83 @@ Date: October 2025
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import os
 from datetime import datetime, timedelta
 from pathlib import Path
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, simpledialog
-import matplotlib.dates as mdates
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.patches import Rectangle
 import json
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard json module is used instead
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow is optional; CSVs are then parsed with pandas' own reader
+    pa = None
+    pa_csv = None
 
 # Default sound level threshold (can be overridden in the UI prompt).
 # Values >= this threshold will be labeled 'active', below -> 'not_active'.
 SOUND_LEVEL_THRESHOLD = 65
 
+# Column types for badge data CSV files (see data_collection.py for the writer).
+# Numeric readings fit comfortably in float32; 'N/A' entries are read as NaN.
+CSV_DTYPES = {
+    'Badge_Name': 'category',
+    'Sound_Level': 'float32',
+    'RSSI': 'float32',
+    'Acceleration': 'float32',
+}
+
+# Processed data is exported as Parquet; set to False to skip the (slower, larger) CSV copy
+EXPORT_CSV = True
+
+# Categories of the exported activity_label column; points outside every label period are 'unknown'
+ACTIVITY_LABELS = ['unknown', 'active', 'not_active']
+
+# Columns that identify a single reading (used to drop duplicate rows)
+ROW_KEY_COLUMNS = ['Timestamp', 'Badge_Name']
+
+# Rows per chunk when parsing CSV files without pyarrow
+CSV_CHUNK_ROWS = 500_000
+
+# Series longer than PLOT_MAX_POINTS are drawn as a min/max envelope over PLOT_BUCKETS
+# buckets (about twice the plot's width in pixels)
+PLOT_MAX_POINTS = 4000
+PLOT_BUCKETS = 2000
+
+MOTION_REDRAW_MS = 16  # Minimum interval between selection redraws while dragging (~60 Hz)
+
+# matplotlib is imported on first use (see load_matplotlib) so the file selection
+# prompt is not delayed by plotting imports
+plt = None
+mdates = None
+FigureCanvasTkAgg = None
+Rectangle = None
+
+def load_matplotlib():
+    """Import the matplotlib modules used by the labeling GUI, once"""
+    global plt, mdates, FigureCanvasTkAgg, Rectangle
+    if plt is None:
+        import matplotlib.pyplot as plt
+        import matplotlib.dates as mdates
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.patches import Rectangle
+
 class BadgeDataProcessor:
     def __init__(self):
         self.data = None
+        self.data_by_badge = {}  # Per-badge slices of self.data (sorted by time) for plotting
+        self.date_nums_by_badge = {}  # Per-badge timestamps as matplotlib date numbers, filled on first plot
         self.processed_data = []
         self.labels = []  # Store time periods and their labels
+        self.labels_by_badge = defaultdict(list)  # The same label dicts, grouped by badge
         self.output_folder = Path("processed_data")
         self.output_folder.mkdir(exist_ok=True)
         
@@ -43,21 +100,6 @@ class BadgeDataProcessor:
         self.fig = None
         self.ax = None
     
-    def normalize_datetime(self, dt):
-        """Convert any datetime-like object to timezone-naive python datetime"""
-        if dt is None:
-            return None
-        
-        # Handle pandas Timestamp
-        if hasattr(dt, 'to_pydatetime'):
-            dt = dt.to_pydatetime()
-        
-        # Remove timezone info if present
-        if hasattr(dt, 'tzinfo') and dt.tzinfo is not None:
-            dt = dt.replace(tzinfo=None)
-        
-        return dt
-        
     def select_file(self):
         """Select badge data file to process"""
         badge_data_folder = Path("../badge_data")
@@ -99,25 +141,38 @@ class BadgeDataProcessor:
         return Path(file_path) if file_path else None
     
     def load_data(self, file_path):
-        """Load and parse badge data from CSV file"""
+        """Load and parse badge data from CSV file, reusing a Parquet cache of the parsed data when it is up to date"""
+        file_path = Path(file_path)
+        cache_file = file_path.with_suffix('.parquet')
         print(f"Loading data from {file_path}...")
         
         try:
-            # Load the CSV file
-            self.data = pd.read_csv(file_path)
+            self.data = None
+            
+            # The cache is only valid if it was written after the CSV last changed
+            if cache_file.exists() and cache_file.stat().st_mtime > file_path.stat().st_mtime:
+                try:
+                    self.data = pd.read_parquet(cache_file)
+                    print(f"Loaded {len(self.data)} data points from cache {cache_file.name}")
+                except Exception as e:
+                    print(f"Could not read cache {cache_file.name}, parsing CSV instead: {e}")
+            
+            if self.data is None:
+                self.data = self.parse_csv(file_path)
+                try:
+                    self.data.to_parquet(cache_file, compression='zstd', index=False)
+                except Exception as e:
+                    print(f"Could not write cache {cache_file.name}: {e}")
             
-            # Convert timestamp to datetime and ensure timezone-naive
-            self.data['Timestamp'] = pd.to_datetime(self.data['Timestamp'], utc=False)
-            # Remove timezone info if present to ensure all are timezone-naive
-            if self.data['Timestamp'].dt.tz is not None:
-                self.data['Timestamp'] = self.data['Timestamp'].dt.tz_localize(None)
+            # Caches written before rows were sorted by badge name are re-sorted once here
+            self.data['Badge_Name'] = self.order_badge_categories(self.data['Badge_Name'])
+            if not self.is_sorted_by_badge_and_time(self.data):
+                self.data = self.data.sort_values(['Badge_Name', 'Timestamp'], kind='mergesort', ignore_index=True)
             
-            # Remove duplicate rows (common in the badge data)
-            initial_count = len(self.data)
-            self.data = self.data.drop_duplicates()
-            removed_count = initial_count - len(self.data)
+            # Split once per load so plot updates are a dictionary lookup instead of a filter + sort
+            self.data_by_badge = {badge: group for badge, group in self.data.groupby('Badge_Name', sort=False, observed=True)}
+            self.date_nums_by_badge = {}
             
-            print(f"Loaded {len(self.data)} data points ({removed_count} duplicates removed)")
             print(f"Time range: {self.data['Timestamp'].min()} to {self.data['Timestamp'].max()}")
             print(f"Badges found: {sorted(self.data['Badge_Name'].unique())}")
             
@@ -127,8 +182,76 @@ class BadgeDataProcessor:
             print(f"Error loading data: {e}")
             return False
     
+    def order_badge_categories(self, badge_names):
+        """Return badge names as a categorical with alphabetically ordered categories"""
+        # pyarrow dictionaries list categories in order of first appearance, pandas sorts them;
+        # sorting here makes the badge order of both parsers (and of old caches) the same
+        badge_names = badge_names.astype('category')
+        return badge_names.cat.reorder_categories(sorted(badge_names.cat.categories))
+    
+    def is_sorted_by_badge_and_time(self, data):
+        """Check that rows are grouped by badge in category order and each badge's rows are in time order"""
+        if data.empty:
+            return True
+        if not data['Badge_Name'].cat.codes.is_monotonic_increasing:
+            return False
+        return data.groupby('Badge_Name', sort=False, observed=True)['Timestamp'].is_monotonic_increasing.all()
+    
+    def parse_csv(self, file_path):
+        """Parse a badge data CSV file into a cleaned DataFrame"""
+        # Load the CSV file. pyarrow parses in multithreaded C++; fall back to the default
+        # parser when pyarrow is not installed.
+        if pa_csv is not None:
+            column_types = {
+                'Badge_Name': pa.dictionary(pa.int32(), pa.string()),
+                'Sound_Level': pa.float32(),
+                'RSSI': pa.float32(),
+                'Acceleration': pa.float32(),
+                'GR': pa.float64(),
+            }
+            table = pa_csv.read_csv(file_path, convert_options=pa_csv.ConvertOptions(column_types=column_types))
+            # self_destruct releases each Arrow column as pandas takes it over, so the
+            # table and the DataFrame are never both fully in memory. Text columns (Raw_Data)
+            # stay Arrow-backed instead of becoming one Python str object per row.
+            data = table.to_pandas(split_blocks=True, self_destruct=True,
+                                   types_mapper={pa.string(): pd.StringDtype('pyarrow')}.get)
+            del table
+            initial_count = len(data)
+        else:
+            # Read in chunks and drop duplicates per chunk so the full file and its
+            # de-duplicated copy are never held in memory at the same time
+            chunks = []
+            initial_count = 0
+            for chunk in pd.read_csv(file_path, dtype=CSV_DTYPES, chunksize=CSV_CHUNK_ROWS):
+                initial_count += len(chunk)
+                chunks.append(chunk.drop_duplicates(subset=ROW_KEY_COLUMNS, keep='first'))
+            data = pd.concat(chunks, ignore_index=True)
+        
+        # Convert timestamp to datetime and ensure timezone-naive
+        data['Timestamp'] = pd.to_datetime(data['Timestamp'], utc=False)
+        # Remove timezone info if present to ensure all are timezone-naive
+        if data['Timestamp'].dt.tz is not None:
+            data['Timestamp'] = data['Timestamp'].dt.tz_localize(None)
+        
+        # Badge names repeat on every row; categorical codes make badge filters and group-bys integer comparisons
+        data['Badge_Name'] = self.order_badge_categories(data['Badge_Name'])
+        
+        # Remove duplicate rows (common in the badge data). A reading is identified by its
+        # badge and timestamp, so only those two fixed-width columns need hashing.
+        data = data.drop_duplicates(subset=ROW_KEY_COLUMNS, keep='first', ignore_index=True)
+        removed_count = initial_count - len(data)
+        
+        # Sort once by badge, then time (stable, so equal timestamps keep file order). Every
+        # per-badge step relies on this order instead of sorting again.
+        data = data.sort_values(['Badge_Name', 'Timestamp'], kind='mergesort', ignore_index=True)
+        
+        print(f"Loaded {len(data)} data points ({removed_count} duplicates removed)")
+        return data
+    
     def create_labeling_gui(self):
         """Create GUI for labeling data segments"""
+        load_matplotlib()
+        
         self.root = tk.Tk()
         self.root.title("Badge Data Labeling Tool")
         self.root.geometry("1200x800")
@@ -220,17 +343,46 @@ class BadgeDataProcessor:
         self.selection_start = None
         self.selection_end = None
         self.selection_rect = None
+        self.background = None  # Saved plot image for blitting the selection while dragging
+        self.motion_pending = False  # A selection redraw is already scheduled
 
         # Bind mouse events
         self.canvas.mpl_connect('button_press_event', self.on_press)
         self.canvas.mpl_connect('button_release_event', self.on_release)
         self.canvas.mpl_connect('motion_notify_event', self.on_motion)
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+        self.canvas.mpl_connect('resize_event', self.on_resize)
+
+        # Plot artists that are reused for every badge and metric
+        self.init_plot()
 
         # Initial plot
         self.update_plot()
 
         return self.root
     
+    def init_plot(self):
+        """Create the data line, label bands and selection rectangle once; update_plot only changes their data"""
+        self.line, = self.ax.plot([], [], 'b-', alpha=0.7, linewidth=1)
+        
+        # All label bands live in a single collection artist, drawn in one call. The x-axis
+        # transform keeps x in dates and y in axes fractions, so the bands span the full height.
+        self.label_bars = self.ax.broken_barh([], (0, 1), alpha=0.3, transform=self.ax.get_xaxis_transform())
+        
+        # Selection rectangle, reused for every drag. It is animated (left out of full redraws)
+        # and only ever blitted; add_artist keeps it out of the data limits.
+        self.selection_rect = Rectangle((0, 0), 0, 1, transform=self.ax.get_xaxis_transform(),
+                                        alpha=0.2, facecolor='blue', animated=True)
+        self.ax.add_artist(self.selection_rect)
+        
+        self.ax.set_xlabel('Time')
+        self.ax.grid(True, alpha=0.3)
+        
+        # Format x-axis (set once; ticks follow the limits without reinstalling these)
+        self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))
+        self.ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=1))
+        self.ax.tick_params(axis='x', labelrotation=45)
+    
     def update_plot(self, event=None):
         """Update the plot based on selected badge and metric"""
         badge_name = self.badge_var.get()
@@ -239,40 +391,72 @@ class BadgeDataProcessor:
         if not badge_name or not metric:
             return
         
-        # Filter data for selected badge
-        badge_data = self.data[self.data['Badge_Name'] == badge_name].copy()
-        badge_data = badge_data.sort_values('Timestamp')
+        # Pre-split, time-sorted data for the selected badge (read-only, so no copy)
+        badge_data = self.data_by_badge.get(badge_name)
+        if badge_data is None:
+            return
         
-        # Clear and plot
-        self.ax.clear()
-        self.ax.plot(badge_data['Timestamp'], badge_data[metric], 'b-', alpha=0.7, linewidth=1)
+        # Swap the line's data in place (any saved blitting background is now stale)
+        self.background = None
+        self.line.set_data(*self.get_plot_series(self.get_date_nums(badge_name), badge_data[metric].to_numpy()))
+        self.ax.relim()
+        self.ax.autoscale_view()
         
         # Draw existing labels
         self.draw_existing_labels()
         
-        self.ax.set_xlabel('Time')
+        # Hide the selection until the next drag
+        self.selection_rect.set_width(0)
+        
         self.ax.set_ylabel(metric)
         self.ax.set_title(f'{badge_name} - {metric}')
-        self.ax.grid(True, alpha=0.3)
-        
-        # Format x-axis
-        self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))
-        self.ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=1))
-        plt.setp(self.ax.xaxis.get_majorticklabels(), rotation=45)
         
-        self.fig.tight_layout()
-        self.canvas.draw()
+        self.canvas.draw_idle()
+    
+    def get_date_nums(self, badge_name):
+        """Return a badge's timestamps as matplotlib date numbers, converting them only once per load"""
+        date_nums = self.date_nums_by_badge.get(badge_name)
+        if date_nums is None:
+            date_nums = mdates.date2num(self.data_by_badge[badge_name]['Timestamp'].to_numpy())
+            self.date_nums_by_badge[badge_name] = date_nums
+        return date_nums
+    
+    def get_plot_series(self, times, values):
+        """Return (times, values) to plot, reduced to a min/max envelope when there are more points than pixels"""
+        if len(values) <= PLOT_MAX_POINTS:
+            return times, values
+        
+        # Keep the min and max of each equal-count bucket so peaks stay visible;
+        # fmin/fmax ignore NaN readings unless a whole bucket is NaN
+        edges = np.linspace(0, len(values), PLOT_BUCKETS + 1, dtype=int)[:-1]
+        mins = np.fmin.reduceat(values, edges)
+        maxs = np.fmax.reduceat(values, edges)
+        return np.repeat(times[edges], 2), np.column_stack((mins, maxs)).ravel()
+    
+    def add_label(self, label):
+        """Record a labeled time period, indexing it by badge and caching its matplotlib date numbers"""
+        load_matplotlib()
+        label['start_num'] = mdates.date2num(label['start'])
+        label['end_num'] = mdates.date2num(label['end'])
+        self.labels.append(label)
+        self.labels_by_badge[label['badge']].append(label)
+    
+    def set_labels(self, labels):
+        """Replace all labels, rebuilding the per-badge index"""
+        self.labels = []
+        self.labels_by_badge = defaultdict(list)
+        for label in labels:
+            self.add_label(label)
     
     def draw_existing_labels(self):
-        """Draw existing labels on the plot"""
-        for label in self.labels:
-            if label['badge'] == self.badge_var.get():
-                color = 'green' if label['label'] == 'active' else 'red'
-                rect = Rectangle((mdates.date2num(label['start']), self.ax.get_ylim()[0]),
-                               mdates.date2num(label['end']) - mdates.date2num(label['start']),
-                               self.ax.get_ylim()[1] - self.ax.get_ylim()[0],
-                               alpha=0.3, facecolor=color)
-                self.ax.add_patch(rect)
+        """Draw existing labels on the plot by replacing the label band rectangles"""
+        badge_labels = self.labels_by_badge.get(self.badge_var.get(), [])
+        self.label_bars.set_verts([[(label['start_num'], 0), (label['start_num'], 1),
+                                    (label['end_num'], 1), (label['end_num'], 0)] for label in badge_labels])
+        self.label_bars.set_facecolor(['green' if label['label'] == 'active' else 'red' for label in badge_labels])
+        
+        # The saved blitting background no longer shows the current labels
+        self.background = None
     
     def on_press(self, event):
         """Handle mouse press for selection"""
@@ -281,8 +465,22 @@ class BadgeDataProcessor:
         # Clear any existing selection first
         self.clear_selection()
         self.selection_start = event.xdata
+        if self.selection_rect is not None:
+            self.selection_rect.set_x(self.selection_start)
+            self.selection_rect.set_width(0)
         print(f"[DEBUG] Mouse press at {event.xdata}")
         
+    def on_resize(self, event):
+        """Refit the layout to the new window size"""
+        self.fig.tight_layout()
+    
+    def on_draw(self, event):
+        """Save the rendered axes after every full redraw (including resizes) for blitting"""
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        # The animated selection is left out of full redraws; put a pending one back on top
+        if self.selection_rect is not None and self.selection_start is not None:
+            self.ax.draw_artist(self.selection_rect)
+    
     def on_motion(self, event):
         """Handle mouse motion for selection"""
         if self.selection_start is None or event.inaxes != self.ax or event.xdata is None:
@@ -291,53 +489,25 @@ class BadgeDataProcessor:
         # Store the current selection end for drawing
         self.selection_end_temp = event.xdata
         
-        # Redraw the plot with the current selection
-        self.update_plot_with_selection()
+        # Coalesce motion events: redraw at most once per MOTION_REDRAW_MS with the latest position
+        if not self.motion_pending:
+            self.motion_pending = True
+            self.root.after(MOTION_REDRAW_MS, self.service_motion)
     
-    def update_plot_with_selection(self):
-        """Update the plot and show current selection"""
-        # Get current selections
-        badge_name = self.badge_var.get()
-        metric = self.metric_var.get()
-        
-        if not badge_name or not metric:
+    def service_motion(self):
+        """Redraw the selection rectangle at the latest mouse position"""
+        self.motion_pending = False
+        if self.selection_start is None or getattr(self, 'selection_end_temp', None) is None:
+            return
+        if self.selection_rect is None or self.background is None:
             return
         
-        # Filter data for selected badge
-        badge_data = self.data[self.data['Badge_Name'] == badge_name].copy()
-        badge_data = badge_data.sort_values('Timestamp')
-        
-        # Clear and plot
-        self.ax.clear()
-        self.ax.plot(badge_data['Timestamp'], badge_data[metric], 'b-', alpha=0.7, linewidth=1)
-        
-        # Draw existing labels
-        self.draw_existing_labels()
-        
-        # Draw current selection if active
-        if self.selection_start is not None and hasattr(self, 'selection_end_temp'):
-            start_x = min(self.selection_start, self.selection_end_temp)
-            width = abs(self.selection_end_temp - self.selection_start)
-            
-            if width > 0:
-                rect = Rectangle((start_x, self.ax.get_ylim()[0]),
-                               width,
-                               self.ax.get_ylim()[1] - self.ax.get_ylim()[0],
-                               alpha=0.2, facecolor='blue')
-                self.ax.add_patch(rect)
-        
-        self.ax.set_xlabel('Time')
-        self.ax.set_ylabel(metric)
-        self.ax.set_title(f'{badge_name} - {metric}')
-        self.ax.grid(True, alpha=0.3)
-        
-        # Format x-axis
-        self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))
-        self.ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=1))
-        plt.setp(self.ax.xaxis.get_majorticklabels(), rotation=45)
-        
-        self.fig.tight_layout()
-        self.canvas.draw_idle()
+        # Blit the selection rectangle over the saved background instead of redrawing the figure
+        self.selection_rect.set_x(min(self.selection_start, self.selection_end_temp))
+        self.selection_rect.set_width(abs(self.selection_end_temp - self.selection_start))
+        self.canvas.restore_region(self.background)
+        self.ax.draw_artist(self.selection_rect)
+        self.canvas.blit(self.ax.bbox)
     
     def on_release(self, event):
         """Handle mouse release for selection"""
@@ -381,7 +551,7 @@ class BadgeDataProcessor:
             end_time = mdates.num2date(max(self.final_selection_start, self.final_selection_end)).replace(tzinfo=None)
             
             # Add label
-            self.labels.append({
+            self.add_label({
                 'badge': self.badge_var.get(),
                 'start': start_time,
                 'end': end_time,
@@ -391,9 +561,9 @@ class BadgeDataProcessor:
             label_text = "Active" if label == "active" else "Not Active"
             self.status_label.config(text=f"Labeled as '{label_text}' - Total labels: {len(self.labels)}")
             
-            # Clear selection and update plot
+            # Show the new label band and clear the selection
+            self.draw_existing_labels()
             self.clear_selection()
-            self.update_plot()
             
         except Exception as e:
             print(f"[ERROR] Failed to label selection: {e}")
@@ -404,7 +574,6 @@ class BadgeDataProcessor:
         """Clear current selection"""
         self.selection_start = None
         self.selection_end = None
-        self.selection_rect = None
         
         # Clear temporary selection variables
         if hasattr(self, 'selection_end_temp'):
@@ -414,8 +583,10 @@ class BadgeDataProcessor:
         if hasattr(self, 'final_selection_end'):
             delattr(self, 'final_selection_end')
         
-        # Update plot to remove selection rectangle
-        self.update_plot()
+        # Hide the selection rectangle; the redraw also refreshes the blitting background
+        if self.selection_rect is not None:
+            self.selection_rect.set_width(0)
+        self.canvas.draw_idle()
         
         # Update status
         if hasattr(self, 'status_label'):
@@ -447,7 +618,7 @@ class BadgeDataProcessor:
             return
 
         # Remove any previously auto-generated labels so repeated runs replace them
-        self.labels = [lbl for lbl in self.labels if lbl.get('source') != 'auto']
+        self.set_labels([lbl for lbl in self.labels if lbl.get('source') != 'auto'])
 
         counts = self.auto_label_by_sound(level_threshold=threshold, min_duration_seconds=min_dur)
         messagebox.showinfo("Auto-label Complete", f"Created {counts.get('active',0)} 'active' and {counts.get('not_active',0)} 'not_active' labels using threshold {threshold}.")
@@ -466,34 +637,33 @@ class BadgeDataProcessor:
 
         counts = {'active': 0, 'not_active': 0}
 
-        for badge in self.data['Badge_Name'].unique():
-            badge_data = self.data[self.data['Badge_Name'] == badge].sort_values('Timestamp').copy()
+        # Reuse the per-badge slices built at load time (already in time order)
+        for badge, badge_data in self.data_by_badge.items():
             if badge_data.empty:
                 continue
 
-            # Create mask: True=active, False=not_active. Treat NaN as False.
-            mask = (badge_data['Sound_Level'].fillna(-np.inf) >= level_threshold)
-            badge_data = badge_data.assign(_mask=mask)
+            # Create mask: True=active, False=not_active. NaN compares False.
+            mask = badge_data['Sound_Level'].to_numpy(dtype=float) >= level_threshold
+            timestamps = badge_data['Timestamp'].to_numpy()
 
-            # Identify contiguous runs where mask value is constant
-            badge_data['_run'] = (badge_data['_mask'] != badge_data['_mask'].shift()).cumsum()
-            grouped = badge_data.groupby('_run')
+            # Contiguous runs where the mask value is constant: boundaries are where it flips
+            boundaries = np.flatnonzero(np.concatenate(([True], mask[1:] != mask[:-1], [True])))
+            starts = boundaries[:-1]
+            ends = boundaries[1:] - 1
+            durations = (timestamps[ends] - timestamps[starts]) / np.timedelta64(1, 's')
+            keep = durations >= min_duration_seconds
 
-            for _, grp in grouped:
-                current_mask = bool(grp['_mask'].iloc[0])
-                start = grp['Timestamp'].iloc[0]
-                end = grp['Timestamp'].iloc[-1]
-                duration = (end - start).total_seconds()
-
-                if duration < min_duration_seconds:
-                    continue
+            # Label times are python datetimes, like manual labels (Timestamp is tz-naive since load)
+            run_starts = pd.DatetimeIndex(timestamps[starts[keep]]).to_pydatetime()
+            run_ends = pd.DatetimeIndex(timestamps[ends[keep]]).to_pydatetime()
 
+            for start, end, current_mask in zip(run_starts, run_ends, mask[starts[keep]]):
                 label_name = 'active' if current_mask else 'not_active'
-                # Append label (ensure tz-naive) and mark as auto-generated
-                self.labels.append({
+                # Append label and mark as auto-generated
+                self.add_label({
                     'badge': badge,
-                    'start': start.replace(tzinfo=None) if hasattr(start, 'tzinfo') else start,
-                    'end': end.replace(tzinfo=None) if hasattr(end, 'tzinfo') else end,
+                    'start': start,
+                    'end': end,
                     'label': label_name,
                     'source': 'auto'
                 })
@@ -502,8 +672,12 @@ class BadgeDataProcessor:
         return counts
     
     def calculate_rolling_statistics(self, badge_data, window_seconds=20):
-        """Calculate rolling statistics for sound and acceleration over time windows"""
-        badge_data = badge_data.sort_values('Timestamp').copy()
+        """Calculate rolling statistics for sound and acceleration over time windows, separately for each badge"""
+        # self.data is already in (Badge_Name, Timestamp) order, so this normally skips the sort
+        if self.is_sorted_by_badge_and_time(badge_data):
+            badge_data = badge_data.reset_index(drop=True)
+        else:
+            badge_data = badge_data.sort_values(['Badge_Name', 'Timestamp']).reset_index(drop=True)
         
         # Set timestamp as index for rolling calculations
         badge_data_indexed = badge_data.set_index('Timestamp')
@@ -511,23 +685,81 @@ class BadgeDataProcessor:
         # Convert window_seconds to pandas timedelta
         window_size = f'{window_seconds}s'
         
-        # Calculate rolling statistics for Sound_Level
-        badge_data['sound_min_20s'] = badge_data_indexed['Sound_Level'].rolling(window=window_size, min_periods=1).min().values
-        badge_data['sound_max_20s'] = badge_data_indexed['Sound_Level'].rolling(window=window_size, min_periods=1).max().values
-        badge_data['sound_mean_20s'] = badge_data_indexed['Sound_Level'].rolling(window=window_size, min_periods=1).mean().values
-        badge_data['sound_std_20s'] = badge_data_indexed['Sound_Level'].rolling(window=window_size, min_periods=1).std().values
-        
-        # Calculate rolling statistics for Acceleration
-        badge_data['accel_min_20s'] = badge_data_indexed['Acceleration'].rolling(window=window_size, min_periods=1).min().values
-        badge_data['accel_max_20s'] = badge_data_indexed['Acceleration'].rolling(window=window_size, min_periods=1).max().values
-        badge_data['accel_mean_20s'] = badge_data_indexed['Acceleration'].rolling(window=window_size, min_periods=1).mean().values
-        badge_data['accel_std_20s'] = badge_data_indexed['Acceleration'].rolling(window=window_size, min_periods=1).std().values
+        # One grouped rolling pass covers every badge and both metrics. Groups come back in
+        # order of first appearance, which matches the (Badge_Name, Timestamp) sort above.
+        rolling = (badge_data_indexed
+                   .groupby('Badge_Name', sort=False, observed=True)[['Sound_Level', 'Acceleration']]
+                   .rolling(window=window_size, min_periods=1))
+        stats = {stat: getattr(rolling, stat)() for stat in ('min', 'max', 'mean', 'std')}
+        
+        # Collect the new columns as plain arrays and attach them in one step rather than
+        # inserting eight columns into the frame one at a time
+        stat_columns = {}
+        for prefix, column in (('sound', 'Sound_Level'), ('accel', 'Acceleration')):
+            # Keep the statistics in the column's own dtype (float32 readings roll up as float64)
+            dtype = badge_data[column].dtype
+            for stat, result in stats.items():
+                stat_columns[f'{prefix}_{stat}_20s'] = result[column].to_numpy(dtype=dtype)
+            
+            # Fill NaN values with 0 for std (happens when there's only 1 data point)
+            std = stat_columns[f'{prefix}_std_20s']
+            stat_columns[f'{prefix}_std_20s'] = np.where(np.isnan(std), 0, std).astype(dtype)
         
-        # Fill NaN values with 0 for std (happens when there's only 1 data point)
-        badge_data['sound_std_20s'] = badge_data['sound_std_20s'].fillna(0)
-        badge_data['accel_std_20s'] = badge_data['accel_std_20s'].fillna(0)
+        return pd.concat([badge_data, pd.DataFrame(stat_columns, index=badge_data.index)], axis=1)
+    
+    def assign_activity_labels(self, data):
+        """Return the activity label of every data point as a Categorical, using the first matching label period for its badge"""
+        categories = ACTIVITY_LABELS + sorted({label['label'] for label in self.labels} - set(ACTIVITY_LABELS))
+        category_codes = {name: code for code, name in enumerate(categories)}
+        codes = np.zeros(len(data), dtype=np.int8)  # 0 is 'unknown'
+        timestamps = pd.DatetimeIndex(data['Timestamp'])
+        
+        for badge, positions in data.groupby('Badge_Name', sort=False, observed=True).indices.items():
+            badge_labels = self.labels_by_badge.get(badge)
+            if not badge_labels:
+                continue
+            
+            # Work on int64 timestamps in the data's unit so all comparisons are integer compares.
+            # Label times are stored tz-naive when the labels are created.
+            badge_times = timestamps[positions]
+            times_i8 = badge_times.asi8
+            starts_i8 = pd.DatetimeIndex([label['start'] for label in badge_labels]).as_unit(badge_times.unit).asi8
+            ends_i8 = pd.DatetimeIndex([label['end'] for label in badge_labels]).as_unit(badge_times.unit).asi8
+            
+            order = np.argsort(starts_i8, kind='stable')
+            sorted_starts = starts_i8[order]
+            sorted_ends = ends_i8[order]
+            
+            if not (sorted_starts[1:] <= np.maximum.accumulate(sorted_ends)[:-1]).any():
+                # Disjoint periods: binary search for the last period starting at or before each point
+                candidate = (np.searchsorted(sorted_starts, times_i8, side='right') - 1).clip(0)
+                inside = (sorted_starts[candidate] <= times_i8) & (times_i8 <= sorted_ends[candidate])
+                match = np.where(inside, order[candidate], -1)
+            else:
+                # Overlapping periods (e.g. manual + auto labels): earlier labels take precedence
+                match = np.full(len(times_i8), -1)
+                for i in range(len(badge_labels) - 1, -1, -1):
+                    match[(times_i8 >= starts_i8[i]) & (times_i8 <= ends_i8[i])] = i
+            
+            label_codes = np.array([category_codes[label['label']] for label in badge_labels], dtype=np.int8)
+            codes[positions] = np.where(match >= 0, label_codes[match.clip(0)], 0)
         
-        return badge_data
+        return pd.Categorical.from_codes(codes, categories=categories)
+    
+    def export_labels(self, labels_file):
+        """Save the labels to a JSON file (datetimes are written as ISO 8601 strings)"""
+        labels_export = [{
+            'badge': label['badge'],
+            'start': label['start'],
+            'end': label['end'],
+            'label': label['label']
+        } for label in self.labels]
+        if orjson is not None:
+            with open(labels_file, 'wb') as f:
+                f.write(orjson.dumps(labels_export, option=orjson.OPT_INDENT_2))
+        else:
+            with open(labels_file, 'w') as f:
+                json.dump(labels_export, f, indent=2, default=datetime.isoformat)
     
     def process_and_export(self):
         """Process all badge data and export to CSV"""
@@ -540,41 +772,12 @@ class BadgeDataProcessor:
         
         print("Processing badge data...")
         
-        # Create a copy of the original data
-        processed_data = self.data.copy()
-        
-        # Calculate rolling statistics for each badge
-        all_processed_data = []
-        badges = processed_data['Badge_Name'].unique()
-        
-        for badge in badges:
-            print(f"Calculating statistics for {badge}...")
-            badge_data = processed_data[processed_data['Badge_Name'] == badge]
-            
-            # Calculate rolling statistics
-            badge_with_stats = self.calculate_rolling_statistics(badge_data, window_seconds=20)
-            all_processed_data.append(badge_with_stats)
-        
-        # Combine all badge data back together
-        processed_data = pd.concat(all_processed_data, ignore_index=True)
-        processed_data = processed_data.sort_values(['Badge_Name', 'Timestamp']).reset_index(drop=True)
+        # Calculate rolling statistics for all badges in one pass (returns a new frame sorted by badge and time)
+        print(f"Calculating statistics for {self.data['Badge_Name'].nunique()} badges...")
+        processed_data = self.calculate_rolling_statistics(self.data, window_seconds=20)
         
         # Add activity labels to each data point
-        processed_data['activity_label'] = 'unknown'
-        
-        for _, row in processed_data.iterrows():
-            badge_name = row['Badge_Name']
-            timestamp = self.normalize_datetime(row['Timestamp'])
-            
-            # Find matching label for this data point
-            for label in self.labels:
-                if label['badge'] == badge_name:
-                    label_start = self.normalize_datetime(label['start'])
-                    label_end = self.normalize_datetime(label['end'])
-                    
-                    if label_start <= timestamp <= label_end:
-                        processed_data.loc[_, 'activity_label'] = label['label']
-                        break
+        processed_data['activity_label'] = self.assign_activity_labels(processed_data)
         
         # Generate timestamp and create session folder
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -583,23 +786,37 @@ class BadgeDataProcessor:
         
         # Generate output files in session folder
         output_file = session_folder / f"processed_badge_data_{timestamp}.csv"
+        parquet_file = session_folder / f"processed_badge_data_{timestamp}.parquet"
         labels_file = session_folder / f"data_labels_{timestamp}.json"
         summary_file = session_folder / f"processing_summary_{timestamp}.txt"
         
-        # Export to CSV
-        processed_data.to_csv(output_file, index=False)
-        
-        # Also save labels for reference
-        with open(labels_file, 'w') as f:
-            json.dump([{
-                'badge': label['badge'],
-                'start': label['start'].isoformat(),
-                'end': label['end'].isoformat(),
-                'label': label['label']
-            } for label in self.labels], f, indent=2)
+        # The output files are independent, so write them on worker threads at the same time
+        data_files = []
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            # Export to Parquet (typed, compressed and much faster to write and load than CSV)
+            parquet_future = executor.submit(processed_data.to_parquet, parquet_file, compression='zstd', index=False)
+            # Export to CSV for tools that need it (always, if Parquet could not be written)
+            csv_future = executor.submit(processed_data.to_csv, output_file, index=False) if EXPORT_CSV else None
+            # Also save labels for reference
+            labels_future = executor.submit(self.export_labels, labels_file)
+            
+            try:
+                parquet_future.result()
+                data_files.append(parquet_file)
+            except Exception as e:
+                print(f"Could not write Parquet output: {e}")
+            
+            if csv_future is None and not data_files:
+                csv_future = executor.submit(processed_data.to_csv, output_file, index=False)
+            if csv_future is not None:
+                csv_future.result()
+                data_files.append(output_file)
+            
+            labels_future.result()
         
         # Create detailed summary
         activity_counts = processed_data['activity_label'].value_counts()
+        activity_counts = activity_counts[activity_counts > 0]
         badges = processed_data['Badge_Name'].unique()
         
         summary_text = f"""Badge Data Processing Summary
@@ -615,11 +832,11 @@ Activity Distribution:
 {activity_counts.to_string()}
 
 Data Quality:
-- Data points per badge: {processed_data.groupby('Badge_Name').size().to_dict()}
+- Data points per badge: {processed_data.groupby('Badge_Name', observed=True).size().to_dict()}
 - Total labeled points: {len(processed_data[processed_data['activity_label'] != 'unknown'])}
 
 Output Files:
-- Processed data: {output_file.name}
+- Processed data: {', '.join(data_file.name for data_file in data_files)}
 - Activity labels: {labels_file.name}
 - This summary: {summary_file.name}
 
@@ -645,14 +862,13 @@ Data Columns:
             f.write(summary_text)
         
         # Show completion message
+        saved_files = '\n'.join(f"✓ {saved_file.name}" for saved_file in [*data_files, labels_file, summary_file])
         completion_msg = f"""Processing Complete!
 
 Session folder created: {session_folder.name}
 
 Files saved:
-✓ {output_file.name}
-✓ {labels_file.name} 
-✓ {summary_file.name}
+{saved_files}
 
 Summary:
 - Total data points: {len(processed_data)}
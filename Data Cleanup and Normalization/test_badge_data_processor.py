@@ -0,0 +1,54 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import badge_data_processor
+
+CSV_HEADER = 'Timestamp,Badge_Name,Sound_Level,RSSI,Acceleration,GR,Raw_Data\n'
+
+# Badges first appear out of alphabetical order, and the file is not in time order
+CSV_ROWS = [
+    '2025-10-01 12:00:02.000,Badge09,61.0,-50,1.0,,"61.0,-50,1.0"',
+    '2025-10-01 12:00:01.000,Badge04,62.0,-51,1.1,,"62.0,-51,1.1"',
+    '2025-10-01 12:00:00.000,Badge09,63.0,-52,1.2,,"63.0,-52,1.2"',
+    '2025-10-01 12:00:03.000,Badge01,64.0,-53,1.3,,"64.0,-53,1.3"',
+    '2025-10-01 12:00:00.500,Badge04,65.0,-54,1.4,,"65.0,-54,1.4"',
+    '2025-10-01 12:00:00.500,Badge04,65.0,-54,1.4,,"65.0,-54,1.4"',
+]
+
+
+class ParseCsvTest(unittest.TestCase):
+    """parse_csv should give the same rows in the same order with or without pyarrow"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.csv_path = Path(self.directory.name) / 'data.csv'
+        self.csv_path.write_text(CSV_HEADER + '\n'.join(CSV_ROWS) + '\n')
+        self.processor = badge_data_processor.BadgeDataProcessor()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def parse_with_pandas(self):
+        with mock.patch.object(badge_data_processor, 'pa_csv', None):
+            return self.processor.parse_csv(self.csv_path)
+
+    def test_rows_sorted_by_badge_name_then_time(self):
+        data = self.parse_with_pandas()
+        self.assertEqual(list(data['Badge_Name']), ['Badge01', 'Badge04', 'Badge04', 'Badge09', 'Badge09'])
+        self.assertEqual(list(data['Sound_Level']), [64.0, 65.0, 62.0, 63.0, 61.0])
+        self.assertTrue(self.processor.is_sorted_by_badge_and_time(data))
+
+    @unittest.skipIf(badge_data_processor.pa_csv is None, "pyarrow is not installed")
+    def test_pyarrow_and_pandas_parsers_agree(self):
+        arrow_data = self.processor.parse_csv(self.csv_path)
+        pandas_data = self.parse_with_pandas()
+        self.assertEqual(list(arrow_data['Badge_Name'].cat.categories), ['Badge01', 'Badge04', 'Badge09'])
+        self.assertEqual(list(arrow_data['Badge_Name']), list(pandas_data['Badge_Name']))
+        self.assertEqual(list(arrow_data['Timestamp']), list(pandas_data['Timestamp']))
+        self.assertEqual(list(arrow_data['Sound_Level']), list(pandas_data['Sound_Level']))
+
+
+if __name__ == '__main__':
+    unittest.main()
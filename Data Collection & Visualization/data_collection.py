@@ -1,12 +1,19 @@
 import asyncio
 import datetime
 import csv
+import io
 import os
+import sys
 # import pymysql
 from bleak import BleakClient, BleakScanner
 import struct
+import numpy as np
 from threading import Thread
 import threading
+import atexit
+import queue
+import collections
+import time
 # import aiomysql
 
 # UUID 정의
@@ -34,22 +41,48 @@ BADGE_ADDRESS = {
 
 
 device_counter=0
+connect_phase_done=None  # asyncio.Event, set once every detected badge has finished its connection attempts
 detected_badge_addresses=[]
 Total_detected_device=0
+stdin_watcher_installed=False  # One ENTER watcher serves every badge
 # TABLENAME=''
 DBName=''
 
-# Global variable to store received data
-received_data = []
+# Global variable to store the most recent received data (every sample is persisted to the CSV)
+RECEIVED_DATA_MAXLEN = 10000
+received_data = collections.deque(maxlen=RECEIVED_DATA_MAXLEN)
+sample_count = 0  # Samples received this session; received_data only keeps the last RECEIVED_DATA_MAXLEN
+badge_sample_counts = collections.Counter()  # Samples received this session per badge
+recent_sounds = {}  # badge name -> deque of its last RECEIVED_DATA_MAXLEN sound readings as floats (NaN if not numeric)
 stop_collection = False
+stop_event = None  # asyncio.Event set together with stop_collection, so collection loops wake immediately
 csv_filename = None
 
+# The unified CSV stays open for the whole session; rows are buffered and flushed periodically.
+# The lock serializes writes from all badges' notification callbacks.
+csv_file_handle = None
+csv_writer = None
+csv_lock = threading.Lock()
+CSV_BUFFER_SIZE = 1 << 16  # bytes
+CSV_FLUSH_INTERVAL = 1.0  # seconds
+
+# Notifications are handed from the BLE callbacks to a single writer thread through this queue
+NOTIFICATION_QUEUE_SIZE = 10000
+NOTIFICATION_BATCH_SIZE = 500
+notification_queue = queue.Queue(maxsize=NOTIFICATION_QUEUE_SIZE)
+dropped_notifications = collections.Counter()  # Readings dropped on a full queue per badge, reported by the status print
+notification_writer_thread = None
+
+# Set to True to print every service/characteristic (and read the readable ones) on connect.
+# Off by default: each read is a BLE round trip that delays the start of data collection.
+DEBUG_DISCOVERY = False
+
 # Global mapping to store client address to badge name mapping
 client_badge_mapping = {}
 # Initialize unified CSV file for all badge data
 def init_unified_csv_file(db_name):
     """Initialize unified CSV file with headers for all badges"""
-    global csv_filename
+    global csv_filename, csv_file_handle, csv_writer
     timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
     
     # Create a folder for CSV files if it doesn't exist
@@ -57,11 +90,15 @@ def init_unified_csv_file(db_name):
     os.makedirs(csv_folder, exist_ok=True)
     
     csv_filename = os.path.join(csv_folder, f"AllBadges_data_{timestamp}.csv")
-    # Create CSV file with headers
-    with open(csv_filename, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.writer(csvfile)
+    # Create CSV file with headers and keep it open for appending rows
+    with csv_lock:
+        if csv_file_handle is not None:
+            csv_file_handle.close()
+        csv_file_handle = open(csv_filename, 'w', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE)
+        csv_writer = csv.writer(csv_file_handle)
         # Add GR (4th numeric field) column support. Raw_Data kept for full payload.
-        writer.writerow(['Timestamp', 'Badge_Name', 'Sound_Level', 'RSSI', 'Acceleration', 'GR', 'Raw_Data'])
+        csv_writer.writerow(['Timestamp', 'Badge_Name', 'Sound_Level', 'RSSI', 'Acceleration', 'GR', 'Raw_Data'])
+        csv_file_handle.flush()
     
     print(f"📝 Created unified CSV file: {csv_filename}")
     return csv_filename
@@ -70,26 +107,65 @@ def init_unified_csv_file(db_name):
 def ensure_unified_csv_exists(db_name):
     """Ensure the unified CSV file exists, create if it doesn't"""
     global csv_filename
-    if csv_filename is None or not os.path.exists(csv_filename):
+    if csv_writer is None or not os.path.exists(csv_filename):
         init_unified_csv_file(db_name)
     return csv_filename
 
 # Function to save data to CSV
 def save_to_csv(timestamp, badge_name, sound, rssi, acceleration, raw_data, gr=None):
     """Save a single data point to unified CSV file"""
-    global csv_filename
-    if csv_filename:
+    # Write GR column if provided (empty string otherwise)
+    save_rows_to_csv([[timestamp, badge_name, sound, rssi, acceleration, gr if gr is not None else "", raw_data]])
+
+def format_csv_rows(rows):
+    """Format data rows as CSV text in one pass, quoting Raw_Data (the only field that holds commas)"""
+    lines = []
+    for timestamp, badge_name, sound, rssi, acceleration, gr, raw_data in rows:
+        if '"' in raw_data or '\n' in raw_data or '\r' in raw_data:
+            # Malformed payload: let the csv module escape it (the other fields are split from it)
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow([timestamp, badge_name, sound, rssi, acceleration, gr, raw_data])
+            lines.append(buffer.getvalue())
+        else:
+            lines.append(f'{timestamp},{badge_name},{sound},{rssi},{acceleration},{gr},"{raw_data}"\r\n')
+    return ''.join(lines)
+
+def save_rows_to_csv(rows):
+    """Save a batch of data rows to unified CSV file"""
+    if csv_writer is not None:
         try:
-            # Use a simple file append (Python handles concurrent access reasonably well for simple appends)
-            with open(csv_filename, 'a', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                # Write GR column if provided (empty string otherwise)
-                writer.writerow([timestamp, badge_name, sound, rssi, acceleration, gr if gr is not None else "", raw_data])
+            text = format_csv_rows(rows)
+            # Buffered write to the shared open file; flushed by flush_csv_periodically()
+            with csv_lock:
+                csv_file_handle.write(text)
         except Exception as e:
             print(f"❌ Error saving to unified CSV: {e}")
     else:
         print("❌ No CSV file initialized!")
 
+def flush_csv_file():
+    """Flush buffered rows to the unified CSV file"""
+    with csv_lock:
+        if csv_file_handle is not None and not csv_file_handle.closed:
+            csv_file_handle.flush()
+
+def close_csv_file():
+    """Flush and close the unified CSV file"""
+    global csv_file_handle, csv_writer
+    with csv_lock:
+        if csv_file_handle is not None and not csv_file_handle.closed:
+            csv_file_handle.close()
+        csv_file_handle = None
+        csv_writer = None
+
+atexit.register(close_csv_file)
+
+async def flush_csv_periodically():
+    """Flush the CSV buffer every CSV_FLUSH_INTERVAL seconds so the live viewer sees new rows"""
+    while True:
+        await asyncio.sleep(CSV_FLUSH_INTERVAL)
+        flush_csv_file()
+
 # Notification callback function
 def create_notification_handler(badge_name):
     """
@@ -102,66 +178,167 @@ def create_notification_handler(badge_name):
         A notification handler function specific to this badge
     """
     def notification_handler(sender, data):
-        """Handle notifications from a specific badge and save to CSV"""
+        """Queue a notification from a specific badge for the writer thread"""
         global stop_collection
         if stop_collection:
             return
-            
+        
+        # Runs on the asyncio event loop: only timestamp and enqueue the raw bytes so
+        # parsing and disk writes never delay the other badges' BLE traffic
         try:
-            # Decode the data
-            decoded_data = data.decode('utf-8')
-            timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]  # Include milliseconds
-            
-            # Parse the data (format: value1,value2,value3[,value4])
-            values = [v.strip() for v in decoded_data.split(',')]
-            if len(values) >= 3:
-                sound_value = values[0]
-                rssi_value = values[1]
-                acc_value = values[2]
-                gr_value = values[3] if len(values) >= 4 else None
-
-                data_entry = {
-                    'timestamp': timestamp,
-                    'badge_name': badge_name,  # Use the specific badge name
-                    'raw_data': decoded_data,
-                    'sound': sound_value,
-                    'rssi': rssi_value,
-                    'acceleration': acc_value,
-                    'gr': gr_value
-                }
-
-                received_data.append(data_entry)
-
-                # Save to CSV immediately (include GR if present)
-                save_to_csv(timestamp, badge_name, sound_value, rssi_value, acc_value, decoded_data, gr_value)
-
-                # Print every 10th reading to avoid spam (but save all to CSV)
-                if len(received_data) % 10 == 0:
-                    if gr_value is not None and gr_value != "":
-                        print(f"[{timestamp}] #{len(received_data)} - {badge_name}: Sound={sound_value}, RSSI={rssi_value}, Acc={acc_value}, GR={gr_value}")
-                    else:
-                        print(f"[{timestamp}] #{len(received_data)} - {badge_name}: Sound={sound_value}, RSSI={rssi_value}, Acc={acc_value}")
-            else:
-                print(f"[{timestamp}] {badge_name} Raw Data: {decoded_data}")
-                # Save raw data too (leave numeric fields as N/A)
-                save_to_csv(timestamp, badge_name, "N/A", "N/A", "N/A", decoded_data, None)
-                
-        except Exception as e:
-            print(f"Error processing notification from {badge_name}: {e}")
-            print(f"Raw data: {data}")
+            notification_queue.put_nowait((time.time_ns(), badge_name, bytes(data)))
+        except queue.Full:
+            dropped_notifications[badge_name] += 1
     
     return notification_handler
 
+def parse_reading(value):
+    """Convert a text reading to a float, or NaN if it is not a number"""
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+def parse_notification(received_ns, badge_name, data):
+    """Parse one raw notification into a unified CSV row"""
+    global sample_count
+    # Decode the data
+    decoded_data = data.decode('utf-8')
+    timestamp = datetime.datetime.fromtimestamp(received_ns / 1e9).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]  # Include milliseconds
+    
+    # Parse the data (format: value1,value2,value3[,value4])
+    values = [v.strip() for v in decoded_data.split(',')]
+    if len(values) >= 3:
+        sound_value = values[0]
+        rssi_value = values[1]
+        acc_value = values[2]
+        gr_value = values[3] if len(values) >= 4 else None
+
+        data_entry = {
+            'timestamp': timestamp,
+            'badge_name': badge_name,  # Use the specific badge name
+            'raw_data': decoded_data,
+            'sound': sound_value,
+            'rssi': rssi_value,
+            'acceleration': acc_value,
+            'gr': gr_value
+        }
+
+        received_data.append(data_entry)
+        sample_count += 1
+        badge_sample_counts[badge_name] += 1
+        if badge_name not in recent_sounds:
+            recent_sounds[badge_name] = collections.deque(maxlen=RECEIVED_DATA_MAXLEN)
+        recent_sounds[badge_name].append(parse_reading(sound_value))
+
+        # Print every 10th reading to avoid spam (but save all to CSV)
+        if sample_count % 10 == 0:
+            if gr_value is not None and gr_value != "":
+                print(f"[{timestamp}] #{sample_count} - {badge_name}: Sound={sound_value}, RSSI={rssi_value}, Acc={acc_value}, GR={gr_value}")
+            else:
+                print(f"[{timestamp}] #{sample_count} - {badge_name}: Sound={sound_value}, RSSI={rssi_value}, Acc={acc_value}")
+
+        # Include GR if present
+        return [timestamp, badge_name, sound_value, rssi_value, acc_value, gr_value if gr_value is not None else "", decoded_data]
+    
+    print(f"[{timestamp}] {badge_name} Raw Data: {decoded_data}")
+    # Save raw data too (leave numeric fields as N/A)
+    return [timestamp, badge_name, "N/A", "N/A", "N/A", "", decoded_data]
+
+def notification_writer():
+    """Writer thread: parse queued notifications in batches and write each batch with one call"""
+    stop = False
+    while not stop:
+        item = notification_queue.get()
+        if item is None:
+            return
+        
+        # Take everything else that is already waiting, up to the batch limit
+        batch = [item]
+        while len(batch) < NOTIFICATION_BATCH_SIZE:
+            try:
+                item = notification_queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                stop = True  # Finish this batch, then stop
+                break
+            batch.append(item)
+        
+        rows = []
+        for received_ns, badge_name, data in batch:
+            try:
+                rows.append(parse_notification(received_ns, badge_name, data))
+            except Exception as e:
+                print(f"Error processing notification from {badge_name}: {e}")
+                print(f"Raw data: {data}")
+        save_rows_to_csv(rows)
+
+def start_notification_writer():
+    """Start the background thread that writes queued notifications to the CSV"""
+    global notification_writer_thread
+    notification_writer_thread = threading.Thread(target=notification_writer, daemon=True)
+    notification_writer_thread.start()
+
+def stop_notification_writer():
+    """Write out all queued notifications and stop the writer thread"""
+    global notification_writer_thread
+    if notification_writer_thread is not None:
+        notification_queue.put(None)
+        notification_writer_thread.join()
+        notification_writer_thread = None
+
+def recent_sound_stats(badge_name):
+    """Return (mean, min, max) of a badge's recent numeric sound readings, or None if it has none"""
+    sounds = np.array(list(recent_sounds.get(badge_name, ())), dtype=float)
+    # Non-numeric readings (e.g. 'N/A') are stored as NaN and left out of the reductions
+    if np.isnan(sounds).all():
+        return None
+    return np.nanmean(sounds), np.nanmin(sounds), np.nanmax(sounds)
+
 # Function to handle user input in a separate thread
-def input_handler():
-    """Handle user input to stop data collection"""
+def input_handler(loop):
+    """Handle user input to stop data collection (fallback thread where stdin cannot be watched by the event loop)"""
     global stop_collection
     try:
-        input("🛑 Press ENTER to stop data collection...\n")
+        input()
         stop_collection = True
         print("\n⏹️  Stopping data collection...")
     except:
         stop_collection = True
+    # Wake the collection loops, which wait on the event loop
+    loop.call_soon_threadsafe(stop_event.set)
+
+def on_stdin_ready(loop):
+    """Stop data collection once a line (ENTER) is read from stdin; runs on the event loop"""
+    global stop_collection
+    loop.remove_reader(sys.stdin.fileno())
+    sys.stdin.readline()
+    stop_collection = True
+    print("\n⏹️  Stopping data collection...")
+    stop_event.set()
+
+def start_stdin_watcher(loop):
+    """Watch stdin for ENTER once for all badges, on the event loop where the platform allows it"""
+    global stdin_watcher_installed
+    if stdin_watcher_installed:
+        return
+    stdin_watcher_installed = True
+    print("🛑 Press ENTER to stop data collection...")
+    try:
+        loop.add_reader(sys.stdin.fileno(), on_stdin_ready, loop)
+    except (NotImplementedError, ValueError, OSError):
+        # Windows event loops cannot watch the console, so a single thread waits on input() instead
+        threading.Thread(target=input_handler, args=(loop,), daemon=True).start()
+
+async def wait_for_any(*events):
+    """Wait until at least one of the asyncio events is set"""
+    waiters = [asyncio.create_task(event.wait()) for event in events]
+    try:
+        await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for waiter in waiters:
+            waiter.cancel()
 
 # 현재 가용한 BLE 장치를 스캔하여 리스트를 출력한다.
 # 콜백함수를 이용하여 장치가 발견되었을 때마다 장치 정보를 출력한다.
@@ -201,14 +378,15 @@ async def connection_run(address):
         # print('not detected address')
         return f"Address {address} not detected"
     
-    lock = asyncio.Lock()
     global device_counter,Total_detected_device,DBName,client_badge_mapping
     BadgeName = BADGE_ADDRESS[address]
     
     max_retries = 3
     retry_count = 0
     
-    client = BleakClient(address)
+    # Bleak reports disconnects through this callback, so the collection loop does not have to poll
+    disconnected = asyncio.Event()
+    client = BleakClient(address, disconnected_callback=lambda _: disconnected.set())
     # Placeholder for the data characteristic UUID chosen at discovery time
     data_char_uuid = None
     
@@ -219,6 +397,8 @@ async def connection_run(address):
             await client.connect(timeout=10)
             if client.is_connected:
                 print(f'Successfully connected to {BadgeName}')
+                # Forget disconnects reported during earlier failed attempts
+                disconnected.clear()
                 # Store the client-badge mapping for notification handling
                 client_badge_mapping[address] = BadgeName
                 break
@@ -233,48 +413,53 @@ async def connection_run(address):
             if retry_count < max_retries:
                 await asyncio.sleep(2)
     
-    # Update counter regardless of connection success
-    async with lock:
-        device_counter += 1
+    # Update counter regardless of connection success; the last badge releases the others
+    device_counter += 1
+    if device_counter >= Total_detected_device:
+        connect_phase_done.set()
 
     if not client.is_connected:
         print(f"Cannot Connect to: {BadgeName} after {max_retries} attempts")
         return f"Failed to connect to {BadgeName}"
 
     # Wait for all devices to finish connection attempts
-    while device_counter < Total_detected_device:
-        await asyncio.sleep(0.5)
+    await connect_phase_done.wait()
     
     print(f"Starting data collection from: {BadgeName}")
 
-    # First, let's discover all available services and characteristics
-    print(f"\n=== Discovering services and characteristics for {BadgeName} ===")
-    try:
-        services = client.services
-        for service in services:
-            print(f"\nService: {service.uuid} ({service.description})")
-            for char in service.characteristics:
-                print(f"  Characteristic: {char.uuid}")
-                print(f"    Description: {char.description}")
-                print(f"    Properties: {char.properties}")
-                
-                # Try to read characteristics that support reading
-                if "read" in char.properties:
-                    try:
-                        value = await client.read_gatt_char(char.uuid)
-                        print(f"    Current value: {value} (hex: {value.hex()})")
-                    except Exception as e:
-                        print(f"    Read error: {e}")
-                
-                # Check for notifications/indications
-                if "notify" in char.properties or "indicate" in char.properties:
-                    print(f"    -> Supports notifications/indications")
-    except Exception as e:
-        print(f"Service discovery error: {e}")
+    services = client.services
+
+    # Optionally dump all available services and characteristics
+    if DEBUG_DISCOVERY:
+        print(f"\n=== Discovering services and characteristics for {BadgeName} ===")
+        try:
+            for service in services:
+                print(f"\nService: {service.uuid} ({service.description})")
+                for char in service.characteristics:
+                    print(f"  Characteristic: {char.uuid}")
+                    print(f"    Description: {char.description}")
+                    print(f"    Properties: {char.properties}")
+                    
+                    # Try to read characteristics that support reading
+                    if "read" in char.properties:
+                        try:
+                            value = await client.read_gatt_char(char.uuid)
+                            print(f"    Current value: {value} (hex: {value.hex()})")
+                        except Exception as e:
+                            print(f"    Read error: {e}")
+                    
+                    # Check for notifications/indications
+                    if "notify" in char.properties or "indicate" in char.properties:
+                        print(f"    -> Supports notifications/indications")
+        except Exception as e:
+            print(f"Service discovery error: {e}")
 
     # Clear any previous data
-    global received_data, stop_collection, csv_filename
-    received_data = []
+    global received_data, sample_count, stop_collection, csv_filename
+    received_data = collections.deque(maxlen=RECEIVED_DATA_MAXLEN)
+    recent_sounds.clear()
+    badge_sample_counts.clear()
+    sample_count = 0
     stop_collection = False
     # Ensure unified CSV file exists (will be shared by all badges)
     csv_file = ensure_unified_csv_exists(DBName)
@@ -359,24 +544,50 @@ async def connection_run(address):
         except Exception as e:
             print(f"⚠️  Could not read initial value: {e}")
 
-        # Start input handler thread
-        input_thread = threading.Thread(target=input_handler, daemon=True)
-        input_thread.start()
+        # Start watching for ENTER (shared by all badges)
+        start_stdin_watcher(asyncio.get_running_loop())
 
         print(f"� Starting continuous data collection...")
         print(f"📊 Data is being saved to: {csv_file}")
         print(f"🔄 Collecting data until you press ENTER...")
 
         # Continuous collection loop
-        collection_start = datetime.datetime.now()
-        last_status_update = datetime.datetime.now()
+        collection_start = time.monotonic()  # Monotonic, so the duration and rates ignore wall-clock adjustments
         status_interval = 10  # Print status every 10 seconds
 
-        while not stop_collection:
-            await asyncio.sleep(0.5)  # Reasonable delay to prevent busy waiting
+        async def print_status():
+            """Print periodic status updates"""
+            last_count = badge_sample_counts[BadgeName]
+            last_status = time.monotonic()
+            while True:
+                await asyncio.sleep(status_interval)
+                now = time.monotonic()
+                badge_count = badge_sample_counts[BadgeName]
+                rate = (badge_count - last_count) / (now - last_status)
+                last_count = badge_count
+                last_status = now
+                dropped = dropped_notifications.pop(BadgeName, 0)
+                if dropped:
+                    print(f"⚠️ {BadgeName}: notification queue full, dropped {dropped} readings in the last {status_interval}s")
+                stats = recent_sound_stats(BadgeName)
+                if stats is None:
+                    print(f"📊 {BadgeName}: {badge_count} data points collected ({rate:.1f}/s), still running...")
+                else:
+                    print(f"📊 {BadgeName}: {badge_count} data points collected ({rate:.1f}/s), "
+                          f"recent sound mean={stats[0]:.1f} min={stats[1]:.1f} max={stats[2]:.1f}, still running...")
+
+        status_task = asyncio.create_task(print_status())
+        try:
+            # Sleep until ENTER is pressed or bleak reports a disconnect
+            while not stop_collection:
+                await wait_for_any(stop_event, disconnected)
+                if stop_collection:
+                    break
 
-            # Check if still connected
-            if not client.is_connected:
+                # Connection lost (a stale event while still connected needs no reconnect)
+                disconnected.clear()
+                if client.is_connected:
+                    continue
                 print(f"⚠️ Connection lost to {BadgeName}, attempting to reconnect...")
                 try:
                     await client.connect(timeout=5)
@@ -399,12 +610,8 @@ async def connection_run(address):
                 except Exception as e:
                     print(f"❌ Reconnection failed for {BadgeName}: {e}")
                     break
-
-            # Print periodic status updates
-            current_time = datetime.datetime.now()
-            if (current_time - last_status_update).seconds >= status_interval:
-                print(f"📊 {BadgeName}: {len(received_data)} data points collected, still running...")
-                last_status_update = current_time
+        finally:
+            status_task.cancel()
         
         # Stop notifications (use discovered characteristic if available)
         try:
@@ -418,17 +625,16 @@ async def connection_run(address):
             print(f"⚠️ Could not stop notifications cleanly: {e}")
         
         # Final summary
-        collection_end = datetime.datetime.now()
-        duration = collection_end - collection_start
+        duration = datetime.timedelta(seconds=time.monotonic() - collection_start)
         print(f"\n=== Data Collection Complete ===")
-        print(f"📊 Total data points collected: {len(received_data)}")
+        print(f"📊 Total data points collected: {sample_count}")
         print(f"⏱️  Collection duration: {duration}")
-        print(f"📈 Average rate: {len(received_data)/duration.total_seconds():.1f} readings/second")
+        print(f"📈 Average rate: {sample_count/duration.total_seconds():.1f} readings/second")
         print(f"📝 Data saved to: {csv_file}")
         
         if received_data:
             print("📋 Last 3 data points:")
-            for i, entry in enumerate(received_data[-3:]):
+            for i, entry in enumerate(list(received_data)[-3:]):
                 print(f"  {i+1}. [{entry['timestamp']}] {entry['raw_data']}")
         
     except Exception as e:
@@ -492,8 +698,10 @@ async def main():
     print('DataBase Name : ',DBName)
     
     # Reset device counter for this run
-    global device_counter
+    global device_counter,connect_phase_done,stop_event
     device_counter = 0
+    connect_phase_done = asyncio.Event()
+    stop_event = asyncio.Event()
     
     # Only connect to detected devices
     connection_tasks = []
@@ -504,18 +712,27 @@ async def main():
     print("🚀 Starting data collection tasks...")
     print("📊 To view live graphs, run: python live_graph_viewer.py")
     
+    # Parse and write notifications off the event loop, and periodically push buffered CSV rows to disk
+    start_notification_writer()
+    flush_task = asyncio.create_task(flush_csv_periodically())
+    
     try:
         # Run data collection
         result = await asyncio.gather(*connection_tasks, return_exceptions=True)
         
         print("Connection results:", result)
-        print(f"📊 Total data points collected: {len(received_data)}")
+        print(f"📊 Total data points collected: {sample_count}")
         print("� Data saved to CSV files in the current directory")
             
     except KeyboardInterrupt:
         print("\n⏹️ Stopping data collection...")
         global stop_collection
         stop_collection = True
+        stop_event.set()
+    finally:
+        flush_task.cancel()
+        stop_notification_writer()
+        close_csv_file()
 
 if __name__ == '__main__':
     asyncio.run(main())
\ No newline at end of file
@@ -17,21 +17,53 @@ Output:
 
 import asyncio
 import datetime
+import re
 from bleak import BleakScanner
 
 # Current known badge patterns to help identify badges
 BADGE_NAME_PATTERNS = ["badge", "arduino", "esp32", "sensor"]
+# All patterns in one case-insensitive regex, so each device name is scanned once
+BADGE_NAME_RE = re.compile('|'.join(map(re.escape, BADGE_NAME_PATTERNS)), re.IGNORECASE)
+
+# The scan ends early once no new device has advertised for this many seconds
+SCAN_QUIET_SECONDS = 2
+
+async def scan_devices(scan_time):
+    """Scan for up to scan_time seconds, stopping early once no new devices show up; returns (device, advertisement) pairs"""
+    loop = asyncio.get_running_loop()
+    found = {}  # address -> (device, advertisement data), latest advertisement wins
+    quiet = asyncio.Event()
+    quiet_timer = None
+    
+    def on_detection(device, advertisement_data):
+        nonlocal quiet_timer
+        if device.address not in found:
+            # A new device restarts the quiet period
+            if quiet_timer is not None:
+                quiet_timer.cancel()
+            quiet_timer = loop.call_later(SCAN_QUIET_SECONDS, quiet.set)
+        found[device.address] = (device, advertisement_data)
+    
+    async with BleakScanner(detection_callback=on_detection):
+        try:
+            await asyncio.wait_for(quiet.wait(), timeout=scan_time)
+        except asyncio.TimeoutError:
+            pass
+    if quiet_timer is not None:
+        quiet_timer.cancel()
+    
+    return list(found.values())
 
 async def find_badge_macs(scan_time=15):
     """Simple scan to find badge MAC addresses"""
     
     print("🔍 Scanning for Badge MAC Addresses...")
-    print(f"⏱️  Scan duration: {scan_time} seconds")
+    print(f"⏱️  Scan duration: up to {scan_time} seconds (stops {SCAN_QUIET_SECONDS}s after the last new device)")
     print("=" * 50)
     
     try:
         # Discover all BLE devices
-        devices = await BleakScanner.discover(timeout=scan_time)
+        devices = await scan_devices(scan_time)
         
         if not devices:
             print("❌ No BLE devices found")
@@ -43,12 +75,12 @@ async def find_badge_macs(scan_time=15):
         potential_badges = []
         other_devices = []
         
-        for device in devices:
+        for device, advertisement_data in devices:
             device_name = device.name or "Unknown"
-            device_rssi = getattr(device, 'rssi', 'N/A')
+            device_rssi = getattr(advertisement_data, 'rssi', 'N/A')
             
             # Check if this might be a badge
-            is_potential_badge = any(pattern in device_name.lower() for pattern in BADGE_NAME_PATTERNS)
+            is_potential_badge = BADGE_NAME_RE.search(device_name) is not None
             
             device_info = {
                 'address': device.address,
@@ -56,7 +88,7 @@ async def find_badge_macs(scan_time=15):
                 'rssi': device_rssi
             }
             
-            if is_potential_badge or "badge" in device_name.lower():
+            if is_potential_badge:
                 potential_badges.append(device_info)
             else:
                 other_devices.append(device_info)
@@ -81,7 +113,8 @@ async def find_badge_macs(scan_time=15):
         all_devices = potential_badges + other_devices
         
         for i, device in enumerate(all_devices, 1):
-            badge_indicator = "🏷️ " if device in potential_badges else "   "
+            # Potential badges come first in all_devices
+            badge_indicator = "🏷️ " if i <= len(potential_badges) else "   "
             print(f"{badge_indicator}{i:2d}. {device['address']} | {device['name']:<15} | RSSI: {device['rssi']}")
         
         # Save to file
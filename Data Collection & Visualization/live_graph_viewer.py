@@ -2,25 +2,69 @@ import matplotlib
 matplotlib.use('TkAgg')
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
-import csv
+import pandas as pd
+import numpy as np
+import io
+import sys
+import argparse
 import time
 import os
 from pathlib import Path
 import tkinter as tk
-from tkinter import ttk
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.lines import Line2D
 
 # Global data storage
-plot_data = []
+badge_buffers = {}  # Last PLOT_POINTS readings for each badge, as (n, 3) arrays of sound, rssi, acceleration
+total_points = 0  # Rows read from the current CSV file
 badge_colors = {}  # Consistent colors for each badge
+next_color_index = 0  # Position in BADGE_COLORS for the next new badge
 badge_toggles = {}  # Toggle states for each badge
 badge_order = []  # Maintain consistent badge order for legend
 root = None
+ani = None
 canvas = None
 toggle_frame = None
 
+# Persistent plot artists, updated in place and blitted every frame
+lines = {}  # (badge_name, axis index) -> Line2D
+point_count_text = None
+legends = []
+legend_dirty = False  # Legends need rebuilding (badge added or toggled)
+lines_dirty = False  # Lines need redrawing even without new rows (plotted point count changed)
+last_artists = []  # Artists returned by the last real update, re-blitted on skipped frames
+frames_per_update = 1  # Only every Nth animation frame reads the CSV (set from the control panel)
+plot_interval_ms = 500  # Animation interval (set from the control panel)
+
+# Columns plotted by the viewer and the number of recent points shown per badge
+PLOT_COLUMNS = ['Badge_Name', 'Sound_Level', 'RSSI', 'Acceleration']
+PLOT_POINTS = 100
+BADGE_COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd',
+                '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf']
+REPLAY_INTERVAL_MS = 200  # Delay between windows when replaying a finished CSV
+FAST_REFRESH_MS = 250  # At or below this interval only every other point is plotted, keeping the per-second cost flat
+
+# The CSV file being followed, and how far into it has been read
+csv_path = None
+csv_handle = None
+csv_offset = 0
+csv_header = None
+
+def open_csv(path):
+    """Start following a CSV file from its beginning, dropping data from the previous file"""
+    global csv_path, csv_handle, csv_offset, csv_header, total_points
+    if csv_handle is not None:
+        csv_handle.close()
+    csv_path = path
+    csv_handle = open(path, 'rb')
+    csv_offset = 0
+    csv_header = None
+    total_points = 0
+    badge_buffers.clear()
+
 def read_latest_csv():
-    """Read the most recent CSV file in the directory"""
+    """Read the rows appended to the most recent CSV file since the last call into badge_buffers"""
+    global csv_offset, csv_header, total_points
     # Look for badge CSV files in the 'badge_data' subfolder
     badge_data_dir = Path('..') / 'badge_data'
     if not badge_data_dir.exists():
@@ -33,52 +77,81 @@ def read_latest_csv():
         if test_file.exists():
             csv_files = [test_file]
         else:
-            return []
+            return 0
     
     # Get the most recent file
     latest_file = max(csv_files, key=os.path.getctime)
     
-    data = []
     import traceback
     try:
-        print(f"[DEBUG] Attempting to read CSV: {latest_file}")
-        with open(latest_file, 'r') as file:
-            reader = csv.DictReader(file)
-            print(f"[DEBUG] CSV columns: {reader.fieldnames}")
-            for row in reader:
-                try:
-                    data.append({
-                        'badge_name': row['Badge_Name'],
-                        'sound': float(row['Sound_Level']) if row['Sound_Level'] != 'N/A' else 0,
-                        'rssi': float(row['RSSI']) if row['RSSI'] != 'N/A' else 0,
-                        'acceleration': float(row['Acceleration']) if row['Acceleration'] != 'N/A' else 0
-                    })
-                except Exception as row_e:
-                    print(f"[ERROR] Problem with row: {row}\n{row_e}")
-                    traceback.print_exc()
+        if latest_file != csv_path:
+            print(f"[DEBUG] Following CSV: {latest_file}")
+            open_csv(latest_file)
+        
+        # Only the bytes appended since the last call are read. A trailing partial line
+        # (the collector may be mid-write) is left for the next call.
+        csv_handle.seek(csv_offset)
+        chunk = csv_handle.read()
+        end = chunk.rfind(b'\n') + 1
+        if end == 0:
+            return 0
+        chunk = chunk[:end]
+        
+        header = csv_header
+        if header is None:
+            header_line, _, chunk = chunk.partition(b'\n')
+            header = header_line.decode('utf-8').strip().split(',')
+            if not chunk:
+                csv_header = header
+                csv_offset += end
+                return 0
+        
+        # Parse the new rows in one vectorized call; missing readings ('N/A') are plotted as 0
+        data = pd.read_csv(io.BytesIO(chunk), header=None, names=header, usecols=PLOT_COLUMNS, na_values=['N/A'])
+        readings = PLOT_COLUMNS[1:]
+        data[readings] = data[readings].apply(pd.to_numeric, errors='coerce').fillna(0)
+        
+        # The bytes only count as read once they parsed; after an error they are retried next call
+        csv_header = header
+        csv_offset += end
+        
+        # Append each badge's new rows to its buffer with array slicing (no per-row Python)
+        values = data[readings].to_numpy(dtype=float)
+        for badge_name, positions in data.groupby('Badge_Name', sort=False).indices.items():
+            if badge_name in badge_buffers:
+                badge_buffers[badge_name] = np.concatenate((badge_buffers[badge_name], values[positions]))[-PLOT_POINTS:]
+            else:
+                badge_buffers[badge_name] = values[positions][-PLOT_POINTS:]
+        total_points += len(data)
+        return len(data)
     except Exception as e:
         print(f"[ERROR] Exception reading CSV '{latest_file}': {e}")
         traceback.print_exc()
-        print(f"Available columns: {list(reader.fieldnames) if 'reader' in locals() else 'Unknown'}")
-    return data
+        return 0
 
 def assign_badge_color(badge_name):
     """Assign a consistent color to a badge"""
-    global badge_colors, badge_order
-    if badge_name not in badge_colors:
-        colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', 
-                 '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf']
-        color_index = len(badge_colors) % len(colors)
-        badge_colors[badge_name] = colors[color_index]
-        # Initialize toggle state for new badge
-        badge_toggles[badge_name] = True
-        # Add to badge order for consistent legend positioning
-        if badge_name not in badge_order:
-            badge_order.append(badge_name)
+    global next_color_index
+    if badge_name in badge_colors:
+        return badge_colors[badge_name]
+    
+    badge_colors[badge_name] = BADGE_COLORS[next_color_index % len(BADGE_COLORS)]
+    next_color_index += 1
+    # Initialize toggle state for new badge
+    badge_toggles[badge_name] = True
+    # Add to badge order for consistent legend positioning
+    if badge_name not in badge_order:
+        badge_order.append(badge_name)
+    # One persistent line per axis, updated in place by update_plot
+    for ax_index, ax in enumerate(axs):
+        lines[(badge_name, ax_index)], = ax.plot([], [], color=badge_colors[badge_name], marker='o', markersize=1,
+                                                 linewidth=1.5, animated=True)
     return badge_colors[badge_name]
 
 def toggle_all_badges(state):
     """Toggle all badges on/off"""
+    global legend_dirty
+    legend_dirty = True
     for badge_name in badge_colors.keys():
         badge_toggles[badge_name] = state
         # Update the checkbox variables if they exist
@@ -185,94 +258,170 @@ def create_toggle_controls():
 
 def toggle_badge(badge_name, state):
     """Toggle visibility of a badge"""
+    global legend_dirty
     badge_toggles[badge_name] = state
+    legend_dirty = True
 
-def update_plot(frame):
-    """Update the plot with new data"""
-    global plot_data
-    
-    # Read fresh data from CSV
-    new_data = read_latest_csv()
-    if not new_data:
-        return
-    
-    plot_data = new_data
-    
-    # Get last 100 points
-    data_slice = plot_data[-100:] if len(plot_data) >= 100 else plot_data
-    
-    if not data_slice:
-        return
-    
-    # Group data by badge and assign consistent colors
-    badge_data = {}
-    for entry in data_slice:
-        badge_name = entry['badge_name']
-        if badge_name not in badge_data:
-            badge_data[badge_name] = {'sound': [], 'rssi': [], 'acceleration': []}
-            # Assign consistent color for this badge
-            assign_badge_color(badge_name)
-        
-        badge_data[badge_name]['sound'].append(entry['sound'])
-        badge_data[badge_name]['rssi'].append(entry['rssi'])
-        badge_data[badge_name]['acceleration'].append(entry['acceleration'])
-    
-    # Update toggle controls if new badges are detected
-    current_badges = set(badge_order)
-    new_badges = set(badge_data.keys()) - current_badges
-    if new_badges:
-        print(f"🔍 New badges detected: {new_badges}")
-        create_toggle_controls()
-    
-    # Clear plots
-    for ax in axs:
-        ax.clear()
-        ax.grid(True, alpha=0.3)
-    
-    # Plot data for each badge (only if toggle is enabled) in consistent order
-    plotted_badges = []
-    for badge_name in badge_order:
-        if badge_name in badge_data and badge_toggles.get(badge_name, True):
-            data = badge_data[badge_name]
-            color = badge_colors[badge_name]
-            
-            if data['sound']:
-                x = list(range(len(data['sound'])))
-                axs[0].plot(x, data['sound'], color=color, label=badge_name, marker='o', markersize=1, linewidth=1.5)
-                axs[1].plot(x, data['rssi'], color=color, label=badge_name, marker='o', markersize=1, linewidth=1.5)
-                axs[2].plot(x, data['acceleration'], color=color, label=badge_name, marker='o', markersize=1, linewidth=1.5)
-                plotted_badges.append(badge_name)
-    
-    # Add placeholder entries for consistent legend positioning
-    for badge_name in badge_order:
-        if badge_name in badge_colors and badge_name not in plotted_badges:
-            color = badge_colors[badge_name]
-            # Add invisible lines to maintain legend order
-            axs[0].plot([], [], color=color, label=f"{badge_name} (hidden)", alpha=0.3, linestyle='--')
-            axs[1].plot([], [], color=color, label=f"{badge_name} (hidden)", alpha=0.3, linestyle='--')
-            axs[2].plot([], [], color=color, label=f"{badge_name} (hidden)", alpha=0.3, linestyle='--')
+def init_plot():
+    """Set up the parts of the axes that stay the same from frame to frame"""
+    global point_count_text
     
-    # Set labels and titles with improved styling
     axs[0].set_ylabel('Sound Level', fontweight='bold')
-    axs[0].set_title(f'Live Sound Level (Total points: {len(plot_data)})', fontweight='bold', pad=10)
-    legend0 = axs[0].legend(loc='upper right', framealpha=0.9, fontsize=8, ncol=1)
-    legend0.set_title("Badges", prop={'weight': 'bold'})
-    
+    axs[0].set_title('Live Sound Level', fontweight='bold', pad=10)
     axs[1].set_ylabel('RSSI (dBm)', fontweight='bold')
     axs[1].set_title('Live RSSI Signal Strength', fontweight='bold', pad=10)
-    legend1 = axs[1].legend(loc='upper right', framealpha=0.9, fontsize=8, ncol=1)
-    legend1.set_title("Badges", prop={'weight': 'bold'})
-    
     axs[2].set_ylabel('Acceleration', fontweight='bold')
     axs[2].set_title('Live Acceleration', fontweight='bold', pad=10)
-    axs[2].set_xlabel('Sample Index (Recent 100 points)', fontweight='bold')
-    legend2 = axs[2].legend(loc='upper right', framealpha=0.9, fontsize=8, ncol=1)
-    legend2.set_title("Badges", prop={'weight': 'bold'})
+    axs[2].set_xlabel(f'Sample Index (Recent {PLOT_POINTS} points per badge)', fontweight='bold')
     
     # Improve plot appearance
     for ax in axs:
+        ax.grid(True, alpha=0.3)
         ax.tick_params(labelsize=8)
         ax.set_facecolor('#f8f9fa')
+    axs[0].set_xlim(0, PLOT_POINTS - 1)
+    
+    # The point count changes every frame, so it is drawn inside the axes where it can be blitted
+    point_count_text = axs[0].text(0.01, 0.95, '', transform=axs[0].transAxes, va='top', fontsize=8, fontweight='bold',
+                                   animated=True)
+
+def update_legends():
+    """Rebuild the legends for the current badges; hidden badges keep their place as faded dashed entries"""
+    global legends
+    legends = []
+    for ax in axs:
+        handles = []
+        for badge_name in badge_order:
+            color = badge_colors[badge_name]
+            if badge_toggles.get(badge_name, True):
+                handles.append(Line2D([], [], color=color, label=badge_name, marker='o', markersize=1, linewidth=1.5))
+            else:
+                handles.append(Line2D([], [], color=color, label=f"{badge_name} (hidden)", alpha=0.3, linestyle='--'))
+        legend = ax.legend(handles=handles, loc='upper right', framealpha=0.9, fontsize=8, ncol=1)
+        legend.set_title("Badges", prop={'weight': 'bold'})
+        # Blitted with the lines, so a rebuilt legend shows without redrawing the cached background
+        legend.set_animated(True)
+        legends.append(legend)
+
+def rescale_y(ax, series):
+    """Move the y limits only when the data leaves them or they are over twice the fitted range; return True if they changed"""
+    series = [values for values in series if len(values)]
+    if not series:
+        return False
+    low = min(values.min() for values in series)
+    high = max(values.max() for values in series)
+    # Fitted limits; a constant series gets a fixed margin so its range is never zero
+    margin = 0.1 * (high - low) if high > low else 1.0
+    target_low, target_high = low - margin, high + margin
+    current_low, current_high = ax.get_ylim()
+    if low >= current_low and high <= current_high and (current_high - current_low) <= 2 * (target_high - target_low):
+        return False
+    ax.set_ylim(target_low, target_high)
+    return True
+
+def update_plot(frame):
+    """Update the plot with new data and return the artists that changed"""
+    global legend_dirty, lines_dirty, last_artists
+    
+    # Skipped frames hand back the previous artists unchanged (blitting would otherwise erase them)
+    if frame % frames_per_update:
+        return last_artists
+    
+    # Read newly appended rows from CSV; nothing to redo if none arrived and no badge or refresh setting changed
+    new_rows = read_latest_csv()
+    if not badge_buffers:
+        return []
+    if new_rows == 0 and not legend_dirty and not lines_dirty:
+        return last_artists
+    lines_dirty = False
+    
+    # Each badge's buffer already holds its last PLOT_POINTS points; the columns are views, not copies
+    badge_data = {}
+    for badge_name, readings in badge_buffers.items():
+        badge_data[badge_name] = {
+            'sound': readings[:, 0],
+            'rssi': readings[:, 1],
+            'acceleration': readings[:, 2]
+        }
+    
+    # Assign consistent colors, and update toggle controls if new badges are detected
+    new_badges = set(badge_data.keys()) - set(badge_order)
+    for badge_name in badge_data:
+        if badge_name in new_badges:
+            assign_badge_color(badge_name)
+    if new_badges:
+        print(f"🔍 New badges detected: {new_badges}")
+        create_toggle_controls()
+        legend_dirty = True
+    
+    # Update one persistent line per badge and axis instead of clearing and replotting
+    step = 2 if plot_interval_ms <= FAST_REFRESH_MS else 1
+    updated = []
+    visible_series = [[], [], []]
+    for badge_name in badge_order:
+        data = badge_data.get(badge_name)
+        visible = data is not None and badge_toggles.get(badge_name, True)
+        for ax_index, key in enumerate(('sound', 'rssi', 'acceleration')):
+            line = lines[(badge_name, ax_index)]
+            if visible:
+                line.set_data(np.arange(len(data[key]))[::step], data[key][::step])
+                visible_series[ax_index].append(data[key])
+            line.set_visible(visible)
+            updated.append(line)
+    
+    point_count_text.set_text(f'Total points: {total_points}')
+    updated.append(point_count_text)
+    
+    if legend_dirty:
+        update_legends()
+        legend_dirty = False
+    updated.extend(legends)
+    
+    # Limits and ticks are part of the cached background: redraw it in full only when they change
+    rescaled = [rescale_y(ax, series) for ax, series in zip(axs, visible_series)]
+    if any(rescaled):
+        fig.canvas.draw()
+    
+    last_artists = updated
+    return updated
+
+def build_replay_frames(path):
+    """Load a finished CSV and precompute one frame of artists per PLOT_POINTS-sample window"""
+    data = pd.read_csv(path, usecols=PLOT_COLUMNS, na_values=['N/A'])
+    if data.empty:
+        return []
+    readings = PLOT_COLUMNS[1:]
+    data[readings] = data[readings].apply(pd.to_numeric, errors='coerce').fillna(0)
+    values = data[readings].to_numpy(dtype=float)
+    badge_rows = data.groupby('Badge_Name', sort=False).indices
+    for badge_name in badge_rows:
+        assign_badge_color(badge_name)
+    
+    # The whole file is known up front, so the y limits are fixed instead of rescaled per frame
+    for ax_index, ax in enumerate(axs):
+        low, high = values[:, ax_index].min(), values[:, ax_index].max()
+        margin = 0.1 * (high - low) if high > low else 1.0
+        ax.set_ylim(low - margin, high + margin)
+    
+    window_count = max(-(-len(rows) // PLOT_POINTS) for rows in badge_rows.values())
+    frames = []
+    for window in range(window_count):
+        start = window * PLOT_POINTS
+        artists = []
+        for badge_name in badge_order:
+            window_rows = badge_rows[badge_name][start:start + PLOT_POINTS]
+            if not len(window_rows):
+                continue
+            for ax_index, ax in enumerate(axs):
+                line, = ax.plot(np.arange(len(window_rows)), values[window_rows, ax_index], color=badge_colors[badge_name],
+                                marker='o', markersize=1, linewidth=1.5, animated=True)
+                artists.append(line)
+        artists.append(axs[0].text(0.01, 0.95, f'Window {window + 1}/{window_count}', transform=axs[0].transAxes,
+                                   va='top', fontsize=8, fontweight='bold', animated=True))
+        frames.append(artists)
+    
+    print(f"🎞️  Precomputed {len(frames)} replay frames from {len(data)} rows in {path}")
+    return frames
 
 def on_closing():
     """Handle window close event"""
@@ -288,6 +437,10 @@ def on_closing():
         pass
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Voice Badge live data viewer")
+    parser.add_argument('--replay', metavar='CSV', help="Play back a finished CSV file instead of following the live one")
+    args = parser.parse_args()
+    
     # Create the main window
     root = tk.Tk()
     root.title("Voice Badge Live Data Viewer")
@@ -316,10 +469,30 @@ if __name__ == "__main__":
     refresh_label = tk.Label(refresh_frame, text="Refresh Rate:", font=('Arial', 12, 'bold'), bg='lightblue')
     refresh_label.pack()
     
-    refresh_var = tk.StringVar(value="500ms")
-    refresh_options = ["250ms", "500ms", "1000ms", "2000ms"]
-    refresh_menu = ttk.Combobox(refresh_frame, textvariable=refresh_var, values=refresh_options, state="readonly", font=('Arial', 11))
-    refresh_menu.pack(pady=5)
+    # Set the animation interval directly, restarting the timer so a long pending tick does not delay the change
+    def update_refresh_rate(value):
+        global plot_interval_ms, lines_dirty
+        plot_interval_ms = int(value)
+        # The thinning depends on the interval, so redraw the lines even if no new rows arrive
+        lines_dirty = True
+        if ani is not None:
+            ani.event_source.interval = plot_interval_ms
+            ani.event_source.stop()
+            ani.event_source.start()
+    
+    refresh_scale = tk.Scale(refresh_frame, label="Interval (ms)", from_=100, to=2000, resolution=50, orient='horizontal',
+                             command=update_refresh_rate, font=('Arial', 10), bg='lightblue')
+    refresh_scale.set(plot_interval_ms)
+    refresh_scale.pack(fill='x', padx=5, pady=5)
+    
+    # Only every Nth frame reads new data and redraws the lines
+    def update_frames_per_update(value):
+        global frames_per_update
+        frames_per_update = int(value)
+    
+    frames_scale = tk.Scale(refresh_frame, label="Update every N frames", from_=1, to=10, orient='horizontal',
+                            command=update_frames_per_update, font=('Arial', 10), bg='lightblue')
+    frames_scale.pack(fill='x', padx=5, pady=5)
     
     # Create plot frame (right side)
     plot_frame = tk.Frame(main_frame)
@@ -345,21 +518,32 @@ if __name__ == "__main__":
         latest_file = max(csv_files, key=os.path.getctime)
         print(f"📄 Latest file: {latest_file}")
     
+    if args.replay:
+        # Replay mode: every frame is built up front and the animation only swaps which artists are shown
+        init_plot()
+        frames = build_replay_frames(args.replay)
+        if not frames:
+            print(f"❌ No rows to replay in {args.replay}")
+            sys.exit(1)
+        update_legends()
+        for legend in legends:
+            legend.set_animated(False)
+        root.title(f"Voice Badge Data Replay - {args.replay}")
+        # The frames are fixed, so badge toggles and refresh settings would have no effect; hide the control panel
+        control_frame.pack_forget()
+        ani = animation.ArtistAnimation(fig, frames, interval=REPLAY_INTERVAL_MS, repeat=True, blit=True)
+        plt.tight_layout()
+        root.mainloop()
+        sys.exit(0)
+    
     # Initialize toggle controls immediately (even if no badges detected yet)
     create_toggle_controls()
     
-    # Function to update refresh rate
-    def update_refresh_rate(*args):
-        global ani
-        rate_map = {"250ms": 250, "500ms": 500, "1000ms": 1000, "2000ms": 2000}
-        new_interval = rate_map[refresh_var.get()]
-        ani.event_source.interval = new_interval
-        print(f"🔄 Refresh rate updated to {refresh_var.get()}")
-    
-    refresh_var.trace('w', update_refresh_rate)
+    init_plot()
     
-    # Create animation with faster default refresh (500ms instead of 2000ms)
-    ani = animation.FuncAnimation(fig, update_plot, interval=500, repeat=True, blit=False, cache_frame_data=False)
+    # Create animation with faster default refresh (500ms instead of 2000ms). Only the lines
+    # and the point count are redrawn each frame; the rest of the figure is blitted from a cache.
+    ani = animation.FuncAnimation(fig, update_plot, interval=plot_interval_ms, repeat=True, blit=True, cache_frame_data=False)
     
     plt.tight_layout()
     
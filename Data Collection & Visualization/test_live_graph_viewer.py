@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+from matplotlib.figure import Figure
+
+import live_graph_viewer
+
+
+class RescaleYTest(unittest.TestCase):
+    """rescale_y should only report a change when the limits actually need to move"""
+
+    def setUp(self):
+        self.ax = Figure().add_subplot()
+        self.ax.set_ylim(-100, 100)
+
+    def test_constant_series_settles(self):
+        series = [np.full(100, -50.0)]
+        self.assertTrue(live_graph_viewer.rescale_y(self.ax, series))
+        self.assertEqual(self.ax.get_ylim(), (-51.0, -49.0))
+        for _ in range(20):
+            self.assertFalse(live_graph_viewer.rescale_y(self.ax, series))
+
+    def test_varying_series_settles(self):
+        series = [np.linspace(0, 10, 100)]
+        self.assertTrue(live_graph_viewer.rescale_y(self.ax, series))
+        for _ in range(20):
+            self.assertFalse(live_graph_viewer.rescale_y(self.ax, series))
+
+    def test_data_leaving_limits_rescales(self):
+        live_graph_viewer.rescale_y(self.ax, [np.linspace(0, 10, 100)])
+        self.assertTrue(live_graph_viewer.rescale_y(self.ax, [np.linspace(0, 20, 100)]))
+
+
+class ReadLatestCsvTest(unittest.TestCase):
+    """read_latest_csv should only move past rows it managed to parse"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.previous_directory = os.getcwd()
+        os.chdir(self.directory.name)
+        Path('badge_data').mkdir()
+        self.csv_path = Path('badge_data') / 'AllBadges_data_20251001_120000.csv'
+        self.csv_path.write_text(
+            'Timestamp,Badge_Name,Sound_Level,RSSI,Acceleration,GR,Raw_Data\n'
+            '2025-10-01 12:00:00.000,Badge01,61.0,-50,1.0,,"61.0,-50,1.0"\n'
+            '2025-10-01 12:00:00.500,Badge04,62.0,N/A,1.1,,"62.0,N/A,1.1"\n'
+        )
+
+    def tearDown(self):
+        if live_graph_viewer.csv_handle is not None:
+            live_graph_viewer.csv_handle.close()
+        live_graph_viewer.csv_handle = None
+        live_graph_viewer.csv_path = None
+        os.chdir(self.previous_directory)
+        self.directory.cleanup()
+
+    def test_rows_are_retried_after_a_parse_error(self):
+        with mock.patch.object(live_graph_viewer.pd, 'read_csv', side_effect=ValueError("bad chunk")), \
+                mock.patch('traceback.print_exc'):
+            self.assertEqual(live_graph_viewer.read_latest_csv(), 0)
+        self.assertEqual(live_graph_viewer.read_latest_csv(), 2)
+        self.assertEqual(live_graph_viewer.total_points, 2)
+        self.assertEqual(live_graph_viewer.badge_buffers['Badge04'].tolist(), [[62.0, 0.0, 1.1]])
+
+
+if __name__ == '__main__':
+    unittest.main()